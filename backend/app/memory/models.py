@@ -18,7 +18,7 @@ class MemoryType(str, Enum):
     FEEDBACK = "feedback"   # User feedback
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryItem:
     """
     A single memory item.
@@ -75,7 +75,7 @@ class MemoryItem:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """
     Memory search result with relevance score.
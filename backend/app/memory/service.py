@@ -117,6 +117,91 @@ class MemoryService:
             accessed_at=datetime.fromisoformat(now),
         )
     
+    def store_many(
+        self,
+        user_id: int,
+        contents: List[str],
+        memory_type: MemoryType = MemoryType.CONTEXT,
+        source_task_id: Optional[int] = None,
+        importance: float = 0.5,
+        metadata: Optional[Dict] = None,
+    ) -> List[MemoryItem]:
+        """
+        Store several memory items in one transaction.
+        
+        Rows are inserted first and the FTS index is filled once for
+        the whole batch, instead of one FTS insert per item.
+        
+        Args:
+            user_id: User ID
+            contents: Memory contents
+            memory_type: Type of memory
+            source_task_id: Related task ID
+            importance: Importance score (0-1)
+            metadata: Additional metadata (shared by all items)
+            
+        Returns:
+            Created MemoryItems, in input order
+        """
+        if not contents:
+            return []
+        
+        now = now_iso()
+        metadata_json = to_json(metadata or {})
+        
+        # Check limit
+        count = self.db.fetch_value(
+            "SELECT COUNT(*) FROM memory_items WHERE user_id = ?",
+            (user_id,),
+            default=0,
+        )
+        
+        if count + len(contents) > self.MAX_MEMORIES_PER_USER:
+            self._cleanup_old_memories(user_id)
+        
+        with self.db.transaction():
+            self.db.execute_many(
+                """INSERT INTO memory_items 
+                   (user_id, memory_type, content, source_task_id, importance, metadata, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (user_id, memory_type.value, content, source_task_id,
+                     importance, metadata_json, now, now)
+                    for content in contents
+                ]
+            )
+            
+            # The write lock is held, so the newest rows are ours
+            rows = self.db.fetch_all(
+                "SELECT id FROM memory_items WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, len(contents))
+            )
+            memory_ids = [row["id"] for row in reversed(rows)]
+            
+            # Update FTS index for the whole batch
+            self.db.execute(
+                """INSERT INTO memory_fts (rowid, content)
+                   SELECT id, content FROM memory_items
+                   WHERE user_id = ? AND id >= ?""",
+                (user_id, memory_ids[0])
+            )
+        
+        created = datetime.fromisoformat(now)
+        return [
+            MemoryItem(
+                id=memory_id,
+                user_id=user_id,
+                memory_type=memory_type,
+                content=content,
+                source_task_id=source_task_id,
+                importance=importance,
+                metadata=dict(metadata or {}),
+                created_at=created,
+                accessed_at=created,
+            )
+            for memory_id, content in zip(memory_ids, contents)
+        ]
+    
     def store_fact(self, user_id: int, content: str, **kwargs) -> MemoryItem:
         """Store a user fact (high importance)."""
         return self.store(
@@ -185,7 +270,7 @@ class MemoryService:
         # Build query with FTS
         if memory_types:
             type_values = ",".join(f"'{t.value}'" for t in memory_types)
-            rows = self.db.fetch_all(
+            rows = self.db.iter_rows(
                 f"""SELECT m.*, fts.rank
                    FROM memory_items m
                    JOIN memory_fts fts ON m.id = fts.rowid
@@ -197,7 +282,7 @@ class MemoryService:
                 (query, user_id, limit)
             )
         else:
-            rows = self.db.fetch_all(
+            rows = self.db.iter_rows(
                 """SELECT m.*, fts.rank
                    FROM memory_items m
                    JOIN memory_fts fts ON m.id = fts.rowid
@@ -216,9 +301,9 @@ class MemoryService:
             # FTS rank is negative, convert to positive score
             score = -row_dict.get("rank", 0) if row_dict.get("rank") else 0.5
             results.append(SearchResult(item=item, score=score))
-            
-            # Update accessed_at
-            self._touch(item.id)
+        
+        # Update accessed_at
+        self._touch_many([r.item.id for r in results])
         
         return results
     
@@ -263,7 +348,7 @@ class MemoryService:
         limit: int = DEFAULT_SEARCH_LIMIT,
     ) -> List[MemoryItem]:
         """Get memories by type."""
-        rows = self.db.fetch_all(
+        rows = self.db.iter_rows(
             """SELECT * FROM memory_items 
                WHERE user_id = ? AND memory_type = ?
                ORDER BY importance DESC, created_at DESC
@@ -281,7 +366,7 @@ class MemoryService:
         """Get recent memories."""
         cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
         
-        rows = self.db.fetch_all(
+        rows = self.db.iter_rows(
             """SELECT * FROM memory_items 
                WHERE user_id = ? AND created_at >= ?
                ORDER BY created_at DESC
@@ -384,6 +469,16 @@ class MemoryService:
             (now_iso(), memory_id)
         )
     
+    def _touch_many(self, memory_ids: List[int]) -> None:
+        """Update accessed_at for several memories in one batch."""
+        if not memory_ids:
+            return
+        now = now_iso()
+        self.db.execute_many(
+            "UPDATE memory_items SET accessed_at = ? WHERE id = ?",
+            [(now, memory_id) for memory_id in memory_ids]
+        )
+    
     def _cleanup_old_memories(self, user_id: int, keep: int = 500) -> int:
         """
         Remove old low-importance memories.
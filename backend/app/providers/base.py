@@ -20,7 +20,7 @@ class MediaType(str, Enum):
     AUDIO = "audio"
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaItem:
     """Media attachment for post."""
     type: MediaType
@@ -34,7 +34,7 @@ class MediaItem:
             raise ValueError("MediaItem requires url, file_path, or file_id")
 
 
-@dataclass
+@dataclass(slots=True)
 class PostResult:
     """Result of posting to social platform."""
     success: bool
@@ -109,6 +109,9 @@ class SocialProvider(ABC):
     supports_scheduling: bool = False
     supports_formatting: bool = True  # Bold, italic, etc.
 
+    # Suffix appended by truncate_text
+    _ELLIPSIS: str = "..."
+
     # Rate limiting
     max_requests_per_second: float = 1.0
 
@@ -214,18 +217,17 @@ class SocialProvider(ABC):
 
     def truncate_text(self, text: str) -> str:
         """Truncate text to platform limit with ellipsis."""
-        if len(text) <= self.max_text_length:
+        limit = self.max_text_length
+        if len(text) <= limit:
             return text
-        return text[:self.max_text_length - 3] + "..."
+        return text[:limit - len(self._ELLIPSIS)] + self._ELLIPSIS
 
     def split_media(self, media: List[MediaItem]) -> List[List[MediaItem]]:
         """Split media into chunks respecting platform limits."""
         if not media:
             return []
-        chunks = []
-        for i in range(0, len(media), self.max_media_per_post):
-            chunks.append(media[i:i + self.max_media_per_post])
-        return chunks
+        n = self.max_media_per_post
+        return [media[i:i + n] for i in range(0, len(media), n)]
 
     async def health_check(self) -> bool:
         """
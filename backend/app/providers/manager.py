@@ -20,7 +20,7 @@ class Platform(str, Enum):
     INSTAGRAM = "instagram"  # TODO
 
 
-@dataclass
+@dataclass(slots=True)
 class CrossPostResult:
     """Result of posting to multiple platforms."""
     results: Dict[str, PostResult] = field(default_factory=dict)
@@ -41,18 +41,19 @@ class CrossPostResult:
 
     def summary(self) -> str:
         """Human-readable summary."""
-        if self.all_success:
-            return f"Posted to {len(self.successful)} platform(s)"
-        elif self.partial_success:
-            return f"Posted to {len(self.successful)}, failed on {len(self.failed)}"
-        elif self.all_failed:
+        n_ok, n_failed = len(self.successful), len(self.failed)
+        if n_ok and not n_failed:
+            return f"Posted to {n_ok} platform(s)"
+        elif n_ok:
+            return f"Posted to {n_ok}, failed on {n_failed}"
+        elif n_failed:
             errors = [self.results[p].error for p in self.failed if self.results[p].error]
-            return f"Failed on all {len(self.failed)} platform(s): {'; '.join(errors[:2])}"
+            return f"Failed on all {n_failed} platform(s): {'; '.join(errors[:2])}"
         else:
             return "No platforms configured"
 
 
-@dataclass
+@dataclass(slots=True)
 class UserChannel:
     """User's connected channel/group."""
     platform: Platform
@@ -7,6 +7,7 @@ Based on Postiz architecture patterns.
 
 import re
 import asyncio
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 
@@ -22,6 +23,25 @@ from .base import (
 )
 
 
+@lru_cache(maxsize=4096)
+def _normalize_channel_id(channel_id: str) -> str:
+    """
+    Normalize channel ID to format Bot API expects.
+
+    Cached: the set of channels a bot posts to is small.
+    """
+    # Already numeric ID
+    if channel_id.startswith("-"):
+        return channel_id
+
+    # Remove @ if present
+    if channel_id.startswith("@"):
+        return channel_id
+
+    # Assume it's a username, add @
+    return f"@{channel_id}"
+
+
 @dataclass
 class TelegramChannel:
     """Telegram channel info."""
@@ -499,16 +519,7 @@ class TelegramProvider(SocialProvider):
 
     def _normalize_channel_id(self, channel_id: str) -> str:
         """Normalize channel ID to format Bot API expects."""
-        # Already numeric ID
-        if channel_id.startswith("-"):
-            return channel_id
-
-        # Remove @ if present
-        if channel_id.startswith("@"):
-            return channel_id
-
-        # Assume it's a username, add @
-        return f"@{channel_id}"
+        return _normalize_channel_id(channel_id)
 
     def _build_message_url(self, chat_id: str, message_id: int) -> Optional[str]:
         """Build URL to the message."""
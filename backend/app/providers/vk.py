@@ -17,6 +17,7 @@ import asyncio
 import hashlib
 import base64
 import secrets
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
@@ -33,6 +34,29 @@ from .base import (
 )
 
 
+_GROUP_PREFIX_RE = re.compile(r'^(club|public)')
+
+
+@lru_cache(maxsize=4096)
+def _normalize_group_id(channel_id: str) -> int:
+    """
+    Normalize group ID to negative owner_id format.
+
+    VK uses negative IDs for groups in many API methods.
+    Cached: a user only manages a handful of groups.
+    """
+    # Remove 'club' or 'public' prefix if present
+    channel_id = channel_id.lower()
+    channel_id = _GROUP_PREFIX_RE.sub('', channel_id)
+
+    # Remove @ if present
+    channel_id = channel_id.lstrip("@-")
+
+    # Parse to int and make negative
+    group_id = int(channel_id)
+    return -abs(group_id)
+
+
 @dataclass
 class VKToken:
     """VK OAuth token."""
@@ -215,8 +239,9 @@ class VKProvider(SocialProvider):
 
     def _generate_pkce_challenge(self, verifier: str) -> str:
         """Generate PKCE code challenge from verifier."""
-        digest = hashlib.sha256(verifier.encode()).digest()
-        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+        digest = hashlib.sha256(verifier.encode("ascii")).digest()
+        # A 32-byte digest always encodes to 43 chars + one "=" pad
+        return base64.urlsafe_b64encode(digest)[:-1].decode("ascii")
 
     # =========================================================================
     # API Methods
@@ -591,18 +616,5 @@ class VKProvider(SocialProvider):
             return False
 
     def _normalize_group_id(self, channel_id: str) -> int:
-        """
-        Normalize group ID to negative owner_id format.
-
-        VK uses negative IDs for groups in many API methods.
-        """
-        # Remove 'club' or 'public' prefix if present
-        channel_id = str(channel_id).lower()
-        channel_id = re.sub(r'^(club|public)', '', channel_id)
-
-        # Remove @ if present
-        channel_id = channel_id.lstrip("@-")
-
-        # Parse to int and make negative
-        group_id = int(channel_id)
-        return -abs(group_id)
+        """Normalize group ID to negative owner_id format."""
+        return _normalize_group_id(str(channel_id))
@@ -5,18 +5,28 @@ Thread-safe SQLite database with connection pooling.
 """
 import os
 import sqlite3
+import itertools
 import logging
 import threading
 import json
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from pathlib import Path
-from typing import Any, Optional, List, Dict, Union
+from typing import Any, Optional, List, Dict, Iterator, Union
 from contextlib import contextmanager
 
-from .schema import init_schema
+from .schema import init_schema, create_from_template
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 _db_logger = logging.getLogger("yadro.database")
 
+# Unique names for in-memory databases, so instances never share one
+_memory_db_ids = itertools.count()
+
 
 class Database:
     """
@@ -26,12 +36,25 @@ class Database:
     NOT a singleton - create instances as needed, but typically use one per app.
     """
 
+    # Per-connection page cache and memory-mapped I/O limits
+    CACHE_SIZE_KB = 64000
+    MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+    # db_path value for a private, single-threaded in-memory database (tests only)
+    MEMORY_PATH = ":memory:"
+
     def __init__(self, db_path: Optional[Union[str, Path]] = None):
         """
         Initialize database.
 
         Args:
             db_path: Path to database file. If None, uses default from settings.
+                ":memory:" keeps the database in RAM for the lifetime of
+                this instance. It is single-threaded and meant for tests:
+                other threads' connections go through SQLite's shared
+                cache, whose table locks fail at once with "database table
+                is locked" (busy_timeout does not apply) while a
+                transaction is open.
         """
         if db_path is None:
             from ..config.settings import settings
@@ -43,22 +66,43 @@ class Database:
             self._busy_timeout_ms = 5000
 
         self._db_path = Path(db_path)
-        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._in_memory = str(db_path) == self.MEMORY_PATH
+        if self._in_memory:
+            # A named shared-cache URI keeps one database behind the
+            # per-thread connections (no concurrent use, see above); it lives
+            # while any connection is open, so hold one for the instance
+            self._connect_target = f"file:yadro-{next(_memory_db_ids)}?mode=memory&cache=shared"
+            self._memory_anchor = sqlite3.connect(
+                self._connect_target, uri=True, check_same_thread=False,
+            )
+        else:
+            self._connect_target = str(self._db_path)
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self._local = threading.local()
         self._lock = threading.Lock()
 
+        # A new file is created with the schema already in it; existing
+        # (or concurrently created) databases run the idempotent DDL
+        created = not self._in_memory and create_from_template(self._db_path)
+
         # Initialize schema on first connection
         conn = self._get_connection()
-        self._startup_integrity_check(conn)
-        init_schema(conn)
+        if self._startup_integrity_check(conn) or not created:
+            init_schema(self._get_connection())
+
+    def _startup_integrity_check(self, conn: sqlite3.Connection) -> bool:
+        """
+        Run integrity check once at startup. Destroy and recreate only if corrupt.
 
-    def _startup_integrity_check(self, conn: sqlite3.Connection) -> None:
-        """Run integrity check once at startup. Destroy and recreate only if corrupt."""
+        Returns:
+            True if the database was recreated (empty)
+        """
         try:
             result = conn.execute("PRAGMA integrity_check").fetchone()
             if result[0] != "ok":
                 raise sqlite3.DatabaseError("integrity_check returned: " + result[0])
+            return False
         except sqlite3.DatabaseError as e:
             _db_logger.warning(
                 "Database corruption detected at %s: %s. Removing and recreating.",
@@ -66,12 +110,13 @@ class Database:
             )
             conn.close()
             self._local.connection = None
-            for ext in ('', '-shm', '-wal'):
+            for ext in (() if self._in_memory else ('', '-shm', '-wal')):
                 path = str(self._db_path) + ext
                 if os.path.exists(path):
                     os.remove(path)
             # Re-establish connection (fresh empty DB)
             self._get_connection()
+            return True
 
     def _in_transaction(self) -> bool:
         """Check if currently in a transaction."""
@@ -81,17 +126,24 @@ class Database:
         """Get thread-local connection."""
         if not hasattr(self._local, 'connection') or self._local.connection is None:
             conn = sqlite3.connect(
-                str(self._db_path),
+                self._connect_target,
+                uri=self._in_memory,
                 check_same_thread=False,
                 timeout=self._busy_timeout_ms / 1000.0,
             )
             conn.row_factory = sqlite3.Row
 
             conn.execute("PRAGMA foreign_keys = ON")
-            journal_mode = "WAL" if self._wal_mode else "DELETE"
+            if self._in_memory:
+                journal_mode = "MEMORY"  # WAL needs a file
+            else:
+                journal_mode = "WAL" if self._wal_mode else "DELETE"
             conn.execute(f"PRAGMA journal_mode = {journal_mode}")
             conn.execute(f"PRAGMA busy_timeout = {self._busy_timeout_ms}")
             conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+            conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE_BYTES}")
 
             self._local.connection = conn
 
@@ -131,6 +183,9 @@ class Database:
         """
         Execute SQL for multiple parameter sets.
         
+        The statement is prepared once and the whole batch runs in a
+        single transaction: either every row is applied or none is.
+        
         Args:
             sql: SQL statement
             params_list: List of parameter tuples
@@ -139,9 +194,14 @@ class Database:
             Number of rows affected
         """
         conn = self._get_connection()
-        cursor = conn.executemany(sql, params_list)
-        if not self._in_transaction():
+        if self._in_transaction():
+            return conn.executemany(sql, params_list).rowcount
+        try:
+            cursor = conn.executemany(sql, params_list)
             conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         return cursor.rowcount
     
     def fetch_one(
@@ -182,6 +242,29 @@ class Database:
         cursor = conn.execute(sql, params)
         return cursor.fetchall()
     
+    def iter_rows(
+        self,
+        sql: str,
+        params: tuple = (),
+        batch_size: int = 256,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Iterate rows, pulling them from SQLite in batches.
+        
+        Args:
+            sql: SQL query
+            params: Query parameters
+            batch_size: Rows fetched per fetchmany() call
+            
+        Yields:
+            Rows
+        """
+        conn = self._get_connection()
+        cursor = conn.execute(sql, params)
+        cursor.arraysize = batch_size
+        while rows := cursor.fetchmany():
+            yield from rows
+    
     def fetch_value(
         self,
         sql: str,
@@ -199,7 +282,11 @@ class Database:
         Returns:
             Value or default
         """
-        row = self.fetch_one(sql, params)
+        conn = self._get_connection()
+        cursor = conn.execute(sql, params)
+        # Plain tuple: no sqlite3.Row is built just to read one column
+        cursor.row_factory = None
+        row = cursor.fetchone()
         if row is None:
             return default
         return row[0]
@@ -234,18 +321,22 @@ class Database:
 
 # JSON helpers
 
+def _json_default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o)} is not JSON serializable")
+
+
 def to_json(obj: Any) -> str:
     """
     Convert object to JSON string.
     
-    Handles datetime objects.
+    Handles datetime objects. Always uses stdlib json: the text is stored
+    in SQLite and matched with LIKE (e.g. memory_items.metadata in the SMM
+    background scan), so its separators must not depend on whether orjson
+    is installed.
     """
-    def default(o):
-        if isinstance(o, (datetime, date)):
-            return o.isoformat()
-        raise TypeError(f"Object of type {type(o)} is not JSON serializable")
-    
-    return json.dumps(obj, default=default, ensure_ascii=False)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False)
 
 
 def from_json(s: Optional[str]) -> Any:
@@ -256,10 +347,15 @@ def from_json(s: Optional[str]) -> Any:
     """
     if not s:
         return None
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
     return json.loads(s)
 
 
 def now_iso() -> str:
     """Get current UTC time as ISO string."""
-    from datetime import timezone
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    # isoformat() is cheaper than strftime(); swap the "+00:00" suffix for "Z"
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")[:-6] + "Z"
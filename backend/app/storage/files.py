@@ -5,19 +5,28 @@ Manages file storage for uploads, outputs, and snapshots.
 """
 import hashlib
 import json
-import uuid
+import mmap
+import os
+import secrets
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, BinaryIO
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class FileRef:
     """
     Reference to a stored file.
     
     Used to track files across the system without hardcoding paths.
+    Immutable: a ref always describes the file as it was saved.
     """
     ref_id: str
     storage_type: str  # uploads, outputs, snapshots
@@ -47,52 +56,92 @@ class FileStorage:
         ├── uploads/    # User uploaded files
         ├── outputs/    # Generated files for user
         └── snapshots/  # Internal snapshots for rollback
+    
+    Backends:
+        disk   - files under base_path (default)
+        memory - contents kept in a dict keyed by file path; nothing is
+                 written to disk. Intended for tests and ephemeral runs.
     """
     
-    def __init__(self, base_path: Optional[Union[str, Path]] = None):
+    BACKENDS = ("disk", "memory")
+    
+    # load_view() memory-maps files at least this large
+    MMAP_THRESHOLD = 256 * 1024
+    
+    # Read size when saving from a file-like object
+    CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(
+        self,
+        base_path: Optional[Union[str, Path]] = None,
+        backend: str = "disk",
+    ):
         """
         Initialize file storage.
         
         Args:
             base_path: Base directory for storage. If None, uses default from settings.
+            backend: "disk" or "memory"
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}. Must be one of {self.BACKENDS}")
+        
         if base_path is None:
             from ..config.settings import settings
             base_path = settings.storage.base_path
         
         self._base_path = Path(base_path)
         
-        # Ensure directories exist
-        for subdir in ["uploads", "outputs", "snapshots"]:
-            (self._base_path / subdir).mkdir(parents=True, exist_ok=True)
+        # Internals work on str paths; Path is only built at the API boundary
+        base = str(self._base_path)
+        self._dirs = {
+            subdir: os.path.join(base, subdir)
+            for subdir in ("uploads", "outputs", "snapshots")
+        }
+        self._blobs: Optional[Dict[str, bytes]] = {} if backend == "memory" else None
+        
+        if self._blobs is None:
+            # Ensure directories exist
+            for path in self._dirs.values():
+                os.makedirs(path, exist_ok=True)
+    
+    @property
+    def backend(self) -> str:
+        """Storage backend name."""
+        return "disk" if self._blobs is None else "memory"
     
-    def _get_dir(self, storage_type: str) -> Path:
+    def _get_dir(self, storage_type: str) -> str:
         """Get directory for storage type."""
-        valid_types = ("uploads", "outputs", "snapshots")
-        if storage_type not in valid_types:
-            raise ValueError(f"Invalid storage_type: {storage_type}. Must be one of {valid_types}")
-        return self._base_path / storage_type
+        try:
+            return self._dirs[storage_type]
+        except KeyError:
+            raise ValueError(
+                f"Invalid storage_type: {storage_type}. Must be one of {tuple(self._dirs)}"
+            ) from None
     
     def _generate_ref_id(self) -> str:
-        """Generate unique reference ID."""
-        return str(uuid.uuid4())
+        """Generate unique reference ID (128 random bits as hex)."""
+        return secrets.token_hex(16)
     
     def _compute_checksum(self, data: bytes) -> str:
         """Compute SHA-256 checksum."""
         return hashlib.sha256(data).hexdigest()
     
-    def _get_file_path(self, ref: FileRef) -> Path:
+    def _get_file_path(self, ref: FileRef) -> str:
         """
         Get full file path for a reference.
         
         Uses sharding: {storage_type}/{ref_id[:2]}/{ref_id}/{filename}
         """
-        shard = ref.ref_id[:2]
-        return self._get_dir(ref.storage_type) / shard / ref.ref_id / ref.filename
+        return self._build_file_path(ref.storage_type, ref.ref_id, ref.filename)
+    
+    def _build_file_path(self, storage_type: str, ref_id: str, filename: str) -> str:
+        """Sharded file path from the parts of a reference."""
+        return os.path.join(self._get_dir(storage_type), ref_id[:2], ref_id, filename)
     
     def save(
         self,
-        data: bytes,
+        data: Union[bytes, BinaryIO],
         storage_type: str,
         filename: str,
         mime_type: Optional[str] = None,
@@ -102,7 +151,8 @@ class FileStorage:
         Save file to storage.
         
         Args:
-            data: File content as bytes
+            data: File content as bytes, or a binary file-like object
+                that is streamed in CHUNK_SIZE pieces
             storage_type: Where to store (uploads/outputs/snapshots)
             filename: Original filename
             mime_type: MIME type
@@ -112,25 +162,75 @@ class FileStorage:
             FileRef pointing to saved file
         """
         ref_id = self._generate_ref_id()
-        checksum = self._compute_checksum(data)
+        created_at = datetime.now(timezone.utc).isoformat()
+        file_path = self._build_file_path(storage_type, ref_id, filename)
         
-        ref = FileRef(
+        if self._blobs is not None:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                data = b"".join(iter(lambda: data.read(self.CHUNK_SIZE), b""))
+            data = bytes(data)
+            checksum, size_bytes = self._compute_checksum(data), len(data)
+            self._blobs[file_path] = data
+        else:
+            # Create directory and save file
+            self._make_ref_dir(os.path.dirname(file_path))
+            
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                checksum, size_bytes = self._compute_checksum(data), len(data)
+                with open(file_path, "wb") as fp:
+                    fp.write(data)
+            else:
+                checksum, size_bytes = self._write_stream(data, file_path)
+        
+        return FileRef(
             ref_id=ref_id,
             storage_type=storage_type,
             filename=filename,
             checksum=checksum,
-            size_bytes=len(data),
+            size_bytes=size_bytes,
             mime_type=mime_type,
-            created_at=datetime.now(timezone.utc).isoformat(),
+            created_at=created_at,
             metadata=metadata,
         )
+    
+    def _make_ref_dir(self, ref_dir: str) -> None:
+        """
+        Create the per-file {shard}/{ref_id} directory.
         
-        # Create directory and save file
-        file_path = self._get_file_path(ref)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_bytes(data)
+        Storage-type directories are created once in __init__, and the
+        shard usually exists already, so try a single mkdir first.
+        """
+        try:
+            os.mkdir(ref_dir)
+        except FileNotFoundError:
+            os.makedirs(ref_dir, exist_ok=True)  # first file in this shard
+        except FileExistsError:
+            pass
+    
+    def _write_stream(self, src: BinaryIO, file_path: str) -> tuple:
+        """
+        Copy a file-like object to disk, hashing in the same pass.
+        
+        Memory use stays at one chunk regardless of file size.
         
-        return ref
+        Returns:
+            Tuple of (checksum, size_bytes)
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(file_path, "wb") as fp:
+                while chunk := src.read(self.CHUNK_SIZE):
+                    hasher.update(chunk)
+                    fp.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return hasher.hexdigest(), size
     
     def load(self, ref: Union[FileRef, Dict[str, Any]]) -> bytes:
         """
@@ -150,10 +250,54 @@ class FileStorage:
         
         file_path = self._get_file_path(ref)
         
-        if not file_path.exists():
+        if self._blobs is not None:
+            try:
+                return self._blobs[file_path]
+            except KeyError:
+                raise FileNotFoundError(f"File not found: {file_path}")
+        
+        try:
+            with open(file_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
+    
+    def load_view(self, ref: Union[FileRef, Dict[str, Any]]) -> memoryview:
+        """
+        Load file as a read-only memoryview.
         
-        return file_path.read_bytes()
+        Files of MMAP_THRESHOLD bytes or more are memory-mapped, so pages
+        are served from the page cache instead of being copied into a new
+        buffer. Release the view when done to unmap the file.
+        
+        Args:
+            ref: FileRef or dict with ref data
+            
+        Returns:
+            Read-only memoryview of the file content
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        if isinstance(ref, dict):
+            ref = FileRef.from_dict(ref)
+        
+        if self._blobs is not None:
+            return memoryview(self.load(ref))
+        
+        file_path = self._get_file_path(ref)
+        
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.MMAP_THRESHOLD:
+                return memoryview(f.read())
+            # The mapping stays valid after the file is closed
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
     
     def save_text(
         self,
@@ -187,10 +331,14 @@ class FileStorage:
         filename: str,
         metadata: Optional[Dict[str, Any]] = None,
     ) -> FileRef:
-        """Save JSON file."""
-        text = json.dumps(obj, ensure_ascii=False, indent=2)
+        """
+        Save JSON file.
+        
+        Always encoded with stdlib json so the file contents do not depend
+        on whether orjson is installed (it is only used by load_json).
+        """
         return self.save(
-            data=text.encode("utf-8"),
+            data=json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"),
             storage_type=storage_type,
             filename=filename,
             mime_type="application/json",
@@ -199,14 +347,21 @@ class FileStorage:
     
     def load_json(self, ref: Union[FileRef, Dict[str, Any]]) -> Any:
         """Load JSON file."""
-        text = self.load_text(ref)
-        return json.loads(text)
+        data = self.load(ref)
+        if HAS_ORJSON:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(data)
     
     def exists(self, ref: Union[FileRef, Dict[str, Any]]) -> bool:
         """Check if file exists."""
         if isinstance(ref, dict):
             ref = FileRef.from_dict(ref)
-        return self._get_file_path(ref).exists()
+        if self._blobs is not None:
+            return self._get_file_path(ref) in self._blobs
+        return os.path.exists(self._get_file_path(ref))
     
     def delete(self, ref: Union[FileRef, Dict[str, Any]]) -> bool:
         """
@@ -223,31 +378,43 @@ class FileStorage:
         
         file_path = self._get_file_path(ref)
         
-        if not file_path.exists():
-            return False
+        if self._blobs is not None:
+            return self._blobs.pop(file_path, None) is not None
         
-        file_path.unlink()
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            return False
         
         # Clean up empty directories
+        ref_dir = os.path.dirname(file_path)
         try:
-            file_path.parent.rmdir()  # ref_id dir
-            file_path.parent.parent.rmdir()  # shard dir
+            os.rmdir(ref_dir)  # ref_id dir
+            os.rmdir(os.path.dirname(ref_dir))  # shard dir
         except OSError:
             pass  # Not empty
         
         return True
     
     def get_path(self, ref: Union[FileRef, Dict[str, Any]]) -> Path:
-        """Get absolute path to file."""
+        """
+        Get absolute path to file.
+        
+        With the memory backend the path is virtual and does not exist on disk.
+        """
         if isinstance(ref, dict):
             ref = FileRef.from_dict(ref)
-        return self._get_file_path(ref).absolute()
+        return Path(os.path.abspath(self._get_file_path(ref)))
     
     def list_files(self, storage_type: str) -> List[Path]:
         """List all files in storage type."""
         storage_dir = self._get_dir(storage_type)
+        if self._blobs is not None:
+            prefix = storage_dir + os.sep
+            return [Path(path) for path in self._blobs if path.startswith(prefix)]
         files = []
-        for path in storage_dir.rglob("*"):
-            if path.is_file() and path.name != ".gitkeep":
-                files.append(path)
+        for dirpath, _, filenames in os.walk(storage_dir):
+            for name in filenames:
+                if name != ".gitkeep":
+                    files.append(Path(dirpath, name))
         return files
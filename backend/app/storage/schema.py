@@ -10,6 +10,12 @@ Core tables:
 - memory_items: память
 - costs: токены и стоимость
 """
+import os
+import secrets
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Union
 
 SCHEMA_SQL = """
 -- Users table
@@ -239,6 +245,54 @@ JOIN users u ON t.user_id = u.id;
 """
 
 
+_template_image: Optional[bytes] = None
+_template_lock = threading.Lock()
+
+
+def _get_template_image() -> bytes:
+    """Serialized schema-only database, built once per process."""
+    global _template_image
+    with _template_lock:
+        if _template_image is None:
+            template = sqlite3.connect(":memory:")
+            template.executescript(SCHEMA_SQL)
+            _template_image = template.serialize()
+            template.close()
+    return _template_image
+
+
+def create_from_template(path: Union[str, Path]) -> bool:
+    """
+    Create a new database file with the schema already in place.
+    
+    The template image is written to a temporary file next to *path* and
+    hard-linked into place. The link fails if *path* exists, so a file
+    that another process created (and may be writing to) is never
+    replaced; that process or ours then runs the idempotent init_schema.
+    
+    Returns:
+        True if this call created *path*
+    """
+    path = os.fspath(path)
+    if os.path.exists(path):
+        return False
+    
+    # 0o644 filtered by the umask, the mode SQLite itself creates files with
+    # (mkstemp would leave the database, and its -wal/-shm, at 0o600)
+    tmp_path = f"{path}.{secrets.token_hex(8)}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_get_template_image())
+        os.link(tmp_path, path)
+        return True
+    except OSError:
+        # Lost the race (FileExistsError) or no hard links on this filesystem
+        return False
+    finally:
+        os.unlink(tmp_path)
+
+
 def init_schema(connection) -> None:
     """Initialize database schema."""
     connection.executescript(SCHEMA_SQL)
@@ -7,6 +7,7 @@ from .policy import PolicyEngine, PolicyConfig, PolicyCheckResult, RateLimiter
 from .runtime import (
     ToolRuntime,
     ToolExecutionError,
+    ToolTimeoutError,
     ToolNotFoundError,
     PolicyViolationError,
     register_builtin_tools,
@@ -32,7 +33,7 @@ __all__ = [
     "ToolSpec", "ToolResult", "ToolCall", "ToolImpact",
     "ToolRegistry", "registry",
     "PolicyEngine", "PolicyConfig", "PolicyCheckResult", "RateLimiter",
-    "ToolRuntime", "ToolExecutionError", "ToolNotFoundError", "PolicyViolationError",
+    "ToolRuntime", "ToolExecutionError", "ToolTimeoutError", "ToolNotFoundError", "PolicyViolationError",
     "register_builtin_tools",
     "BrowserTool", "SearchResult", "web_search", "HAS_BROWSER",
     "BrowserAgent", "run_agent", "HAS_AGENT",
@@ -8,6 +8,8 @@ from datetime import datetime, timezone
 from typing import Optional, Any, Dict, List, Callable
 from enum import Enum
 
+from ..storage import to_json
+
 
 class ToolImpact(str, Enum):
     """Tool impact level."""
@@ -24,7 +26,7 @@ class ToolValidationError(Exception):
         super().__init__(f"Validation failed for '{tool_name}': {'; '.join(errors)}")
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolSpec:
     """
     Tool specification.
@@ -63,7 +65,7 @@ class ToolSpec:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResult:
     """
     Result of tool execution.
@@ -85,9 +87,13 @@ class ToolResult:
             "tool_name": self.tool_name,
             "execution_time_ms": self.execution_time_ms,
         }
+    
+    def to_json(self) -> str:
+        """Serialize to_dict() with storage.to_json."""
+        return to_json(self.to_dict())
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     """
     Record of a tool call.
@@ -101,13 +107,17 @@ class ToolCall:
     user_id: Optional[int] = None
     step_id: Optional[str] = None
     
-    # Timing
+    # Timing (wall clock for display, monotonic ns for durations)
     called_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    called_at_ns: Optional[int] = None
+    completed_at_ns: Optional[int] = None
     
     @property
     def execution_time_ms(self) -> Optional[int]:
         """Calculate execution time in milliseconds."""
+        if self.called_at_ns is not None and self.completed_at_ns is not None:
+            return (self.completed_at_ns - self.called_at_ns) // 1_000_000
         if self.called_at and self.completed_at:
             delta = self.completed_at - self.called_at
             return int(delta.total_seconds() * 1000)
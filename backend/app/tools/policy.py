@@ -3,10 +3,11 @@ Yadro v0 - Policy Engine
 
 Enforces tool usage policies and limits.
 """
+import bisect
+import threading
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, List, Set
-from collections import defaultdict
+from typing import Optional, AbstractSet, Callable, Dict, FrozenSet, Iterable, List, Sequence, Tuple
 
 from .models import ToolSpec, ToolImpact
 
@@ -24,38 +25,144 @@ class PolicyConfig:
     # Tool-specific limits
     tool_limits: Dict[str, int] = field(default_factory=dict)  # per minute
     
-    # Domain allowlist for web tools
-    allowed_domains: Set[str] = field(default_factory=set)
+    # Domain allowlist for web tools. "example.com" allows the domain and
+    # its subdomains, "*.example.com" only its subdomains.
+    allowed_domains: AbstractSet[str] = field(default_factory=frozenset)
     
     # Command whitelist for shell tool
-    allowed_commands: Set[str] = field(default_factory=set)
+    allowed_commands: AbstractSet[str] = field(default_factory=frozenset)
     
     # Resource limits
     max_output_size_bytes: int = 10 * 1024 * 1024  # 10 MB
     max_execution_time_seconds: int = 300  # 5 minutes
+    
+    # Parents of "*." entries, derived from allowed_domains
+    _wildcard_domains: FrozenSet[str] = field(init=False, repr=False, default=frozenset())
+    
+    def __post_init__(self):
+        self.allowed_domains = frozenset(
+            d.lower().rstrip(".") for d in self.allowed_domains
+        )
+        self._wildcard_domains = frozenset(
+            d[2:] for d in self.allowed_domains if d.startswith("*.")
+        )
+        self.allowed_commands = frozenset(self.allowed_commands)
+
+
+def _url_host(url: str) -> str:
+    """Extract the lowercased host from an absolute URL without urlparse."""
+    host = url.partition("://")[2]
+    for sep in "/?#":
+        host = host.partition(sep)[0]
+    host = host.rpartition("@")[2].partition(":")[0]
+    return host.lower().rstrip(".")
+
+
+def _domain_allowed(host: str, allowed: AbstractSet[str], wildcards: AbstractSet[str]) -> bool:
+    """
+    Check host and each parent domain against the allowlist.
+    
+    One set lookup per label, so the cost does not grow with the
+    allowlist; wildcard entries only match on parents, never the host.
+    """
+    if host in allowed:
+        return True
+    host = host.partition(".")[2]
+    while host:
+        if host in allowed or host in wildcards:
+            return True
+        host = host.partition(".")[2]
+    return False
+
+
+class _Window:
+    """Per-second call buckets for one (user, tool) key."""
+    __slots__ = ("starts", "cumulative", "base")
+    
+    def __init__(self):
+        # Sorted bucket indices and the running call count through each one
+        self.starts: List[int] = []
+        self.cumulative: List[int] = []
+        # Running count before starts[0] (calls in trimmed buckets)
+        self.base = 0
+    
+    def count_after(self, cutoff: int) -> int:
+        """Count calls in buckets newer than cutoff."""
+        if not self.starts:
+            return 0
+        idx = bisect.bisect_right(self.starts, cutoff)
+        before = self.cumulative[idx - 1] if idx else self.base
+        return self.cumulative[-1] - before
 
 
 class RateLimiter:
     """
     Simple in-memory rate limiter.
     
-    Tracks calls per user per time window.
+    Tracks calls per user per time window as per-second buckets with
+    running totals, so recording and counting a window are each a bisect,
+    and memory per key is bounded by RETENTION_SECONDS / BUCKET_SECONDS
+    regardless of traffic. Keys with no calls left in retention are swept
+    every SWEEP_EVERY records, so idle users do not accumulate. A single
+    lock makes it safe to share between worker threads; it is held only
+    for the bucket arithmetic.
     """
     
+    BUCKET_SECONDS = 1
+    RETENTION_SECONDS = 3600  # longest window PolicyEngine asks for
+    SWEEP_EVERY = 1024
+    _BUCKET_NS = BUCKET_SECONDS * 1_000_000_000
+    
     def __init__(self):
         """Initialize rate limiter."""
-        # user_id -> list of timestamps
-        self._calls: Dict[int, List[datetime]] = defaultdict(list)
-        # user_id -> tool_name -> list of timestamps
-        self._tool_calls: Dict[int, Dict[str, List[datetime]]] = defaultdict(lambda: defaultdict(list))
+        # (user_id, tool_name) -> window; tool_name None aggregates all tools
+        self._windows: Dict[Tuple[int, Optional[str]], _Window] = {}
+        self._lock = threading.Lock()
+        self._ops_since_sweep = 0
+    
+    def _bucket(self) -> int:
+        # Integer monotonic clock: no float drift, immune to wall-clock jumps
+        return time.monotonic_ns() // self._BUCKET_NS
     
     def record_call(self, user_id: int, tool_name: Optional[str] = None) -> None:
         """Record a call."""
-        now = datetime.now(timezone.utc)
-        self._calls[user_id].append(now)
+        with self._lock:
+            # Read the clock under the lock so buckets stay in order
+            bucket = self._bucket()
+            self._add(self._windows.setdefault((user_id, None), _Window()), bucket)
+            
+            if tool_name:
+                self._add(self._windows.setdefault((user_id, tool_name), _Window()), bucket)
+            
+            self._ops_since_sweep += 1
+            if self._ops_since_sweep >= self.SWEEP_EVERY:
+                self._ops_since_sweep = 0
+                self._sweep(bucket)
+    
+    def _sweep(self, bucket: int) -> None:
+        """Drop keys whose newest bucket is past retention."""
+        oldest = bucket - self.RETENTION_SECONDS // self.BUCKET_SECONDS
+        expired = [k for k, w in self._windows.items() if w.starts[-1] <= oldest]
+        for key in expired:
+            del self._windows[key]
+    
+    def _add(self, window: _Window, bucket: int) -> None:
+        """Increment the current bucket and trim expired ones."""
+        starts, cumulative = window.starts, window.cumulative
+        if starts and starts[-1] == bucket:
+            cumulative[-1] += 1
+        else:
+            starts.append(bucket)
+            cumulative.append((cumulative[-1] if cumulative else window.base) + 1)
         
-        if tool_name:
-            self._tool_calls[user_id][tool_name].append(now)
+        # Expired buckets are skipped by bisect anyway; only pay for the
+        # list shift once they make up more than half of it
+        oldest = bucket - self.RETENTION_SECONDS // self.BUCKET_SECONDS
+        idx = bisect.bisect_right(starts, oldest)
+        if idx > len(starts) // 2:
+            window.base = cumulative[idx - 1]
+            del starts[:idx]
+            del cumulative[:idx]
     
     def get_calls_in_window(
         self,
@@ -68,56 +175,60 @@ class RateLimiter:
         
         Args:
             user_id: User ID
-            window_seconds: Time window in seconds
+            window_seconds: Time window in seconds (at most RETENTION_SECONDS)
             tool_name: Optional tool name filter
             
         Returns:
             Number of calls in window
         """
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(seconds=window_seconds)
-        
-        if tool_name:
-            calls = self._tool_calls[user_id].get(tool_name, [])
-        else:
-            calls = self._calls[user_id]
-        
-        # Count calls after cutoff
-        count = sum(1 for ts in calls if ts > cutoff)
-        
-        # Clean up old entries
-        self._cleanup(user_id, cutoff, tool_name)
-        
-        return count
+        with self._lock:
+            now = self._bucket()
+            window = self._windows.get((user_id, tool_name or None))
+            if window is None:
+                return 0
+            
+            seconds = min(window_seconds, self.RETENTION_SECONDS)
+            return window.count_after(now - seconds // self.BUCKET_SECONDS)
     
-    def _cleanup(
+    def get_calls_in_windows(
         self,
-        user_id: int,
-        cutoff: datetime,
-        tool_name: Optional[str] = None,
-    ) -> None:
-        """Remove old entries."""
-        if tool_name:
-            if user_id in self._tool_calls and tool_name in self._tool_calls[user_id]:
-                self._tool_calls[user_id][tool_name] = [
-                    ts for ts in self._tool_calls[user_id][tool_name]
-                    if ts > cutoff
-                ]
-        else:
-            if user_id in self._calls:
-                self._calls[user_id] = [
-                    ts for ts in self._calls[user_id]
-                    if ts > cutoff
-                ]
+        user_ids: Iterable[int],
+        windows_seconds: Sequence[int],
+    ) -> Dict[int, Tuple[int, ...]]:
+        """
+        Count all-tool calls for many users under one lock and clock read.
+        
+        Args:
+            user_ids: Users to report on
+            windows_seconds: Time windows in seconds
+            
+        Returns:
+            user_id -> counts, one per window in windows_seconds order
+        """
+        with self._lock:
+            now = self._bucket()
+            cutoffs = [
+                now - min(w, self.RETENTION_SECONDS) // self.BUCKET_SECONDS
+                for w in windows_seconds
+            ]
+            empty = (0,) * len(cutoffs)
+            result = {}
+            for user_id in user_ids:
+                window = self._windows.get((user_id, None))
+                result[user_id] = (
+                    empty if window is None
+                    else tuple(window.count_after(c) for c in cutoffs)
+                )
+            return result
     
     def clear(self, user_id: Optional[int] = None) -> None:
         """Clear rate limit data."""
-        if user_id:
-            self._calls.pop(user_id, None)
-            self._tool_calls.pop(user_id, None)
-        else:
-            self._calls.clear()
-            self._tool_calls.clear()
+        with self._lock:
+            if user_id:
+                for key in [k for k in self._windows if k[0] == user_id]:
+                    del self._windows[key]
+            else:
+                self._windows.clear()
 
 
 @dataclass
@@ -135,6 +246,10 @@ class PolicyCheckResult:
         return cls(allowed=False, reason=reason)
 
 
+# check(tool, user_id, task_type, parameters) -> deny result or None
+_Check = Callable[[ToolSpec, int, str, Dict], Optional[PolicyCheckResult]]
+
+
 class PolicyEngine:
     """
     Policy Engine - enforces tool usage policies.
@@ -156,6 +271,9 @@ class PolicyEngine:
         """
         self.config = config or PolicyConfig()
         self._rate_limiter = RateLimiter()
+        # tool name -> checks that apply to it; built on first check, so
+        # config changes after that are not picked up
+        self._pipelines: Dict[str, Tuple[_Check, ...]] = {}
     
     def check_tool_call(
         self,
@@ -176,13 +294,51 @@ class PolicyEngine:
         Returns:
             PolicyCheckResult
         """
-        # Check task type allowlist
+        pipeline = self._pipelines.get(tool.name)
+        if pipeline is None:
+            pipeline = self._pipelines[tool.name] = self._build_pipeline(tool.name)
+        
+        for check in pipeline:
+            denied = check(tool, user_id, task_type, parameters)
+            if denied is not None:
+                return denied
+        
+        return PolicyCheckResult.allow()
+    
+    def _build_pipeline(self, tool_name: str) -> Tuple[_Check, ...]:
+        """Select the checks that can apply to a tool, in check order."""
+        checks: List[_Check] = [self._check_task_type, self._check_global_rate]
+        if tool_name in self.config.tool_limits:
+            checks.append(self._check_tool_rate)
+        # An empty allowlist allows everything, so skip the parameter parsing
+        if self.config.allowed_domains and tool_name in ("web_fetch", "web_search"):
+            checks.append(self._check_domain)
+        if self.config.allowed_commands and tool_name == "shell":
+            checks.append(self._check_command)
+        return tuple(checks)
+    
+    def _check_task_type(
+        self,
+        tool: ToolSpec,
+        user_id: int,
+        task_type: str,
+        parameters: Dict,
+    ) -> Optional[PolicyCheckResult]:
+        """Check task type allowlist."""
         if tool.allowed_task_types and task_type not in tool.allowed_task_types:
             return PolicyCheckResult.deny(
                 f"Tool '{tool.name}' not allowed for task type '{task_type}'"
             )
-        
-        # Check global rate limit
+        return None
+    
+    def _check_global_rate(
+        self,
+        tool: ToolSpec,
+        user_id: int,
+        task_type: str,
+        parameters: Dict,
+    ) -> Optional[PolicyCheckResult]:
+        """Check global rate limit."""
         calls_per_minute = self._rate_limiter.get_calls_in_window(user_id, 60)
         if calls_per_minute >= self.config.max_tool_calls_per_minute:
             return PolicyCheckResult.deny(
@@ -194,39 +350,57 @@ class PolicyEngine:
             return PolicyCheckResult.deny(
                 f"Rate limit exceeded: {calls_per_hour}/{self.config.max_tool_calls_per_hour} calls/hour"
             )
-        
-        # Check tool-specific rate limit
-        if tool.name in self.config.tool_limits:
-            tool_calls = self._rate_limiter.get_calls_in_window(user_id, 60, tool.name)
-            tool_limit = self.config.tool_limits[tool.name]
-            if tool_calls >= tool_limit:
+        return None
+    
+    def _check_tool_rate(
+        self,
+        tool: ToolSpec,
+        user_id: int,
+        task_type: str,
+        parameters: Dict,
+    ) -> Optional[PolicyCheckResult]:
+        """Check tool-specific rate limit."""
+        tool_calls = self._rate_limiter.get_calls_in_window(user_id, 60, tool.name)
+        tool_limit = self.config.tool_limits[tool.name]
+        if tool_calls >= tool_limit:
+            return PolicyCheckResult.deny(
+                f"Tool rate limit exceeded: {tool_calls}/{tool_limit} calls/minute for '{tool.name}'"
+            )
+        return None
+    
+    def _check_domain(
+        self,
+        tool: ToolSpec,
+        user_id: int,
+        task_type: str,
+        parameters: Dict,
+    ) -> Optional[PolicyCheckResult]:
+        """Check domain allowlist for web tools."""
+        url = parameters.get("url") or parameters.get("query", "")
+        if "://" in url:
+            if not _domain_allowed(
+                _url_host(url), self.config.allowed_domains, self.config._wildcard_domains,
+            ):
                 return PolicyCheckResult.deny(
-                    f"Tool rate limit exceeded: {tool_calls}/{tool_limit} calls/minute for '{tool.name}'"
+                    f"Domain not in allowlist"
                 )
-        
-        # Check domain allowlist for web tools
-        if tool.name in ("web_fetch", "web_search"):
-            url = parameters.get("url") or parameters.get("query", "")
-            if self.config.allowed_domains:
-                domain_allowed = any(
-                    domain in url for domain in self.config.allowed_domains
-                )
-                if not domain_allowed and "://" in url:
-                    return PolicyCheckResult.deny(
-                        f"Domain not in allowlist"
-                    )
-        
-        # Check command whitelist for shell tool
-        if tool.name == "shell":
-            command = parameters.get("command", "")
-            if self.config.allowed_commands:
-                cmd_base = command.split()[0] if command else ""
-                if cmd_base not in self.config.allowed_commands:
-                    return PolicyCheckResult.deny(
-                        f"Command '{cmd_base}' not in whitelist"
-                    )
-        
-        return PolicyCheckResult.allow()
+        return None
+    
+    def _check_command(
+        self,
+        tool: ToolSpec,
+        user_id: int,
+        task_type: str,
+        parameters: Dict,
+    ) -> Optional[PolicyCheckResult]:
+        """Check command whitelist for shell tool."""
+        command = parameters.get("command", "")
+        cmd_base = (command.split(None, 1) or [""])[0]
+        if cmd_base not in self.config.allowed_commands:
+            return PolicyCheckResult.deny(
+                f"Command '{cmd_base}' not in whitelist"
+            )
+        return None
     
     def record_call(self, user_id: int, tool_name: str) -> None:
         """Record a tool call for rate limiting."""
@@ -238,13 +412,22 @@ class PolicyEngine:
     
     def get_rate_limit_status(self, user_id: int) -> Dict:
         """Get current rate limit status for user."""
+        return self.get_rate_limit_status_bulk([user_id])[user_id]
+    
+    def get_rate_limit_status_bulk(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Get current rate limit status for many users in one pass."""
+        counts = self._rate_limiter.get_calls_in_windows(user_ids, (60, 3600))
+        limits = {
+            "per_minute": self.config.max_tool_calls_per_minute,
+            "per_hour": self.config.max_tool_calls_per_hour,
+        }
         return {
-            "calls_per_minute": self._rate_limiter.get_calls_in_window(user_id, 60),
-            "calls_per_hour": self._rate_limiter.get_calls_in_window(user_id, 3600),
-            "limits": {
-                "per_minute": self.config.max_tool_calls_per_minute,
-                "per_hour": self.config.max_tool_calls_per_hour,
-            },
+            user_id: {
+                "calls_per_minute": per_minute,
+                "calls_per_hour": per_hour,
+                "limits": dict(limits),
+            }
+            for user_id, (per_minute, per_hour) in counts.items()
         }
     
     def reset_rate_limits(self, user_id: Optional[int] = None) -> None:
@@ -3,7 +3,8 @@ Yadro v0 - Tool Registry
 
 Manages tool registration and lookup.
 """
-from typing import Optional, Dict, List, Callable
+import sys
+from typing import Optional, Dict, List, Tuple, Callable
 
 from .models import ToolSpec, ToolImpact
 
@@ -22,6 +23,14 @@ class ToolRegistry:
     def __init__(self):
         """Initialize empty registry."""
         self._tools: Dict[str, ToolSpec] = {}
+        # Derived views, reset whenever _tools changes
+        self._by_task_type: Dict[str, Tuple[ToolSpec, ...]] = {}
+        self._names: Optional[Tuple[str, ...]] = None
+    
+    def _invalidate(self) -> None:
+        """Drop cached views of _tools."""
+        self._by_task_type.clear()
+        self._names = None
     
     def register(
         self,
@@ -52,24 +61,30 @@ class ToolRegistry:
         Returns:
             Created ToolSpec
         """
+        # Names are a small fixed set reused as dict keys on every call
+        # (registry, rate limiter, policy pipelines); interning lets those
+        # lookups match by identity
         spec = ToolSpec(
-            name=name,
+            name=sys.intern(name),
             handler=handler,
             description=description,
             impact=impact,
             requires_approval=requires_approval,
             sandbox=sandbox,
             timeout_seconds=timeout_seconds,
-            allowed_task_types=allowed_task_types or [],
+            allowed_task_types=list(allowed_task_types or ()),
             parameters=parameters or {},
         )
         
-        self._tools[name] = spec
+        self._tools[spec.name] = spec
+        self._invalidate()
         return spec
     
     def register_spec(self, spec: ToolSpec) -> None:
         """Register a ToolSpec directly."""
+        spec.name = sys.intern(spec.name)
         self._tools[spec.name] = spec
+        self._invalidate()
     
     def unregister(self, name: str) -> bool:
         """
@@ -80,6 +95,7 @@ class ToolRegistry:
         """
         if name in self._tools:
             del self._tools[name]
+            self._invalidate()
             return True
         return False
     
@@ -95,30 +111,38 @@ class ToolRegistry:
         """List all registered tools."""
         return list(self._tools.values())
     
-    def list_names(self) -> List[str]:
-        """List all tool names."""
-        return list(self._tools.keys())
+    def list_names(self) -> Tuple[str, ...]:
+        """List all tool names (cached until the registry changes)."""
+        if self._names is None:
+            self._names = tuple(self._tools)
+        return self._names
     
-    def list_for_task_type(self, task_type: str) -> List[ToolSpec]:
+    def list_for_task_type(self, task_type: str) -> Tuple[ToolSpec, ...]:
         """
         List tools allowed for specific task type.
         
+        The result is memoized per task type until the registry changes.
+        
         Args:
             task_type: Task type to filter by
             
         Returns:
-            List of allowed tools
+            Tuple of allowed tools
         """
-        result = []
-        for spec in self._tools.values():
+        result = self._by_task_type.get(task_type)
+        if result is None:
             # Empty allowed_task_types means all types allowed
-            if not spec.allowed_task_types or task_type in spec.allowed_task_types:
-                result.append(spec)
+            result = tuple(
+                spec for spec in self._tools.values()
+                if not spec.allowed_task_types or task_type in spec.allowed_task_types
+            )
+            self._by_task_type[task_type] = result
         return result
     
     def clear(self) -> None:
         """Remove all tools from registry."""
         self._tools.clear()
+        self._invalidate()
 
 
 # Global registry instance
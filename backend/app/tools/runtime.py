@@ -5,6 +5,7 @@ Executes tools with policy enforcement and logging.
 """
 import time
 import asyncio
+import threading
 import concurrent.futures
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
@@ -28,6 +29,77 @@ _TRANSIENT_ERRORS = (TimeoutError, ConnectionError, OSError)
 _TOOL_RETRY_MAX = 3
 _TOOL_RETRY_BASE_DELAY = 0.5  # seconds
 
+# Shared worker pool for tool handlers (created on first use)
+_HANDLER_WORKERS = 32
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# A timed-out handler keeps its worker until it returns (threads cannot be
+# stopped). Healthy calls run with unlimited per-tool concurrency, but once
+# a tool has _TOOL_MAX_ABANDONED timed-out handlers still running, new calls
+# to it are refused; calls to any tool are refused while every worker is busy.
+_TOOL_MAX_ABANDONED = 4
+_abandoned: Dict[str, int] = {}
+_running_total = 0
+_slots_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the process-wide handler pool, creating it once."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=_HANDLER_WORKERS, thread_name_prefix="tool",
+                )
+    return _executor
+
+
+class _HandlerSlot:
+    """Bookkeeping for one handler submitted to the pool."""
+    __slots__ = ("tool_name", "abandoned", "done")
+    
+    def __init__(self, tool_name: str):
+        self.tool_name = tool_name
+        self.abandoned = False
+        self.done = False
+
+
+def _acquire_slot(tool_name: str) -> _HandlerSlot:
+    """Reserve a pool worker for *tool_name* or raise ToolExecutionError."""
+    global _running_total
+    with _slots_lock:
+        abandoned = _abandoned.get(tool_name, 0)
+        if abandoned >= _TOOL_MAX_ABANDONED:
+            message = f"Tool '{tool_name}' has {abandoned} timed-out calls still running"
+        elif _running_total >= _HANDLER_WORKERS:
+            message = f"Tool worker pool is saturated ({_running_total} handlers running)"
+        else:
+            _running_total += 1
+            return _HandlerSlot(tool_name)
+    _logger.warning("Rejecting call to '%s': %s", tool_name, message)
+    raise ToolExecutionError(message)
+
+
+def _abandon_slot(slot: _HandlerSlot) -> None:
+    """Count a timed-out handler against its tool until it returns."""
+    with _slots_lock:
+        if not slot.done:
+            slot.abandoned = True
+            _abandoned[slot.tool_name] = _abandoned.get(slot.tool_name, 0) + 1
+
+
+def _release_slot(slot: _HandlerSlot) -> None:
+    """Return a worker reserved by _acquire_slot once its handler finishes."""
+    global _running_total
+    with _slots_lock:
+        slot.done = True
+        _running_total -= 1
+        if slot.abandoned:
+            _abandoned[slot.tool_name] -= 1
+
+
 # Minimal type map — maps JSON-schema type names to Python types
 _TYPE_MAP = {
     "string": (str,),
@@ -92,6 +164,16 @@ class ToolExecutionError(Exception):
     pass
 
 
+class ToolTimeoutError(ToolExecutionError):
+    """
+    Raised when a handler exceeds its timeout.
+    
+    Not a TimeoutError subclass on purpose: the handler is still running,
+    so the call must not be retried on top of it.
+    """
+    pass
+
+
 class ToolNotFoundError(Exception):
     """Raised when tool is not found."""
     pass
@@ -179,6 +261,8 @@ class ToolRuntime:
         tool = self._registry.get(tool_name)
         if tool is None:
             raise ToolNotFoundError(f"Tool '{tool_name}' not found")
+        # Use the registry's interned name from here on
+        tool_name = tool.name
 
         # 2. Check policy
         check = self._policy_engine.check_tool_call(
@@ -201,20 +285,21 @@ class ToolRuntime:
             user_id=user_id,
             step_id=step_id,
             called_at=datetime.now(timezone.utc),
+            called_at_ns=time.monotonic_ns(),
         )
 
         # 4. Execute with retry (transient errors only)
-        start_time = time.time()
         result: Optional[ToolResult] = None
 
         for attempt in range(_TOOL_RETRY_MAX):
             try:
                 result_data = self._execute_with_timeout(
+                    tool_name,
                     tool.handler,
                     parameters,
                     tool.timeout_seconds,
                 )
-                execution_time_ms = int((time.time() - start_time) * 1000)
+                execution_time_ms = (time.monotonic_ns() - call.called_at_ns) // 1_000_000
                 result = ToolResult(
                     success=True,
                     data=result_data,
@@ -233,7 +318,7 @@ class ToolRuntime:
                     time.sleep(delay)
                     continue
                 # Final attempt exhausted
-                execution_time_ms = int((time.time() - start_time) * 1000)
+                execution_time_ms = (time.monotonic_ns() - call.called_at_ns) // 1_000_000
                 result = ToolResult(
                     success=False,
                     error=f"Failed after {_TOOL_RETRY_MAX} retries: {type(e).__name__}: {e}",
@@ -244,7 +329,7 @@ class ToolRuntime:
 
             except Exception as e:
                 # Non-transient error — no retry
-                execution_time_ms = int((time.time() - start_time) * 1000)
+                execution_time_ms = (time.monotonic_ns() - call.called_at_ns) // 1_000_000
                 result = ToolResult(
                     success=False,
                     error=f"{type(e).__name__}: {str(e)}",
@@ -256,6 +341,7 @@ class ToolRuntime:
         # 5. Record call and audit log
         call.result = result
         call.completed_at = datetime.now(timezone.utc)
+        call.completed_at_ns = time.monotonic_ns()
 
         # Record for rate limiting
         self._policy_engine.record_call(user_id, tool_name)
@@ -267,6 +353,7 @@ class ToolRuntime:
     
     def _execute_with_timeout(
         self,
+        tool_name: str,
         handler,
         parameters: Dict,
         timeout_seconds: int,
@@ -274,7 +361,15 @@ class ToolRuntime:
         """
         Execute handler with timeout.
         
+        Runs on the shared handler pool, so no thread is spawned per call
+        and a timed-out handler does not block the caller while it finishes.
+        Python cannot stop a running thread, so a timed-out handler keeps its
+        worker until it returns. Calls to a tool with _TOOL_MAX_ABANDONED such
+        handlers, or made while all _HANDLER_WORKERS are busy, are refused
+        with ToolExecutionError instead of queueing behind hung handlers.
+        
         Args:
+            tool_name: Tool name (for the in-flight cap)
             handler: Function to execute
             parameters: Parameters to pass
             timeout_seconds: Timeout in seconds
@@ -283,14 +378,23 @@ class ToolRuntime:
             Handler result
             
         Raises:
-            TimeoutError: If execution times out
+            ToolTimeoutError: If execution times out (not retried)
+            ToolExecutionError: If the tool has too many timed-out handlers
+                still running, or the pool has no free workers
         """
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(handler, **parameters)
-            try:
-                return future.result(timeout=timeout_seconds)
-            except concurrent.futures.TimeoutError:
-                raise TimeoutError(f"Execution timed out after {timeout_seconds}s")
+        slot = _acquire_slot(tool_name)
+        try:
+            future = _get_executor().submit(handler, **parameters)
+        except BaseException:
+            _release_slot(slot)
+            raise
+        future.add_done_callback(lambda _: _release_slot(slot))
+        try:
+            return future.result(timeout=timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            if not future.cancel():
+                _abandon_slot(slot)
+            raise ToolTimeoutError(f"Execution timed out after {timeout_seconds}s")
     
     def _log_tool_call(self, call: ToolCall) -> None:
         """Log tool call to database."""
@@ -379,54 +483,45 @@ def _telegram_publish(channel: str, content: str) -> Dict:
     }
 
 
-def register_builtin_tools(runtime: ToolRuntime) -> None:
-    """Register built-in tools to runtime."""
-    
-    runtime.registry.register(
-        name="web_search",
-        handler=_web_search,
+# Built-in tool registrations: (name, handler, register() options).
+# Built once at import; each runtime gets its own ToolSpec instances.
+_BUILTIN_TOOLS = (
+    ("web_search", _web_search, dict(
         description="Search the web",
         impact=ToolImpact.LOW,
         sandbox=True,
-    )
-    
-    runtime.registry.register(
-        name="web_fetch",
-        handler=_web_fetch,
+    )),
+    ("web_fetch", _web_fetch, dict(
         description="Fetch web page content",
         impact=ToolImpact.LOW,
         sandbox=True,
-    )
-    
-    runtime.registry.register(
-        name="file_read",
-        handler=_file_read,
+    )),
+    ("file_read", _file_read, dict(
         description="Read file content",
         impact=ToolImpact.LOW,
         sandbox=True,
-    )
-    
-    runtime.registry.register(
-        name="file_write",
-        handler=_file_write,
+    )),
+    ("file_write", _file_write, dict(
         description="Write content to file",
         impact=ToolImpact.MEDIUM,
         sandbox=True,
-    )
-    
-    runtime.registry.register(
-        name="shell",
-        handler=_shell,
+    )),
+    ("shell", _shell, dict(
         description="Execute shell command",
         impact=ToolImpact.HIGH,
         sandbox=True,
-    )
-    
-    runtime.registry.register(
-        name="telegram_publish",
-        handler=_telegram_publish,
+    )),
+    ("telegram_publish", _telegram_publish, dict(
         description="Publish to Telegram channel",
         impact=ToolImpact.HIGH,
         requires_approval=True,
-        allowed_task_types=["smm"],
-    )
+        allowed_task_types=("smm",),
+    )),
+)
+
+
+def register_builtin_tools(runtime: ToolRuntime) -> None:
+    """Register built-in tools to runtime."""
+    register = runtime.registry.register
+    for name, handler, options in _BUILTIN_TOOLS:
+        register(name=name, handler=handler, **options)
@@ -121,6 +121,21 @@ class TestMemoryService:
         assert item.content == "User prefers morning meetings"
         assert item.memory_type == MemoryType.FACT
     
+    def test_store_many(self, service, user_id):
+        """Test storing a batch of memories."""
+        items = service.store_many(
+            user_id,
+            ["Python tips", "Rust ownership", "Python typing"],
+            memory_type=MemoryType.FACT,
+        )
+        
+        assert [i.content for i in items] == ["Python tips", "Rust ownership", "Python typing"]
+        assert all(i.id is not None for i in items)
+        assert service.get(items[1].id).content == "Rust ownership"
+        
+        results = service.search(user_id, "Python")
+        assert {r.item.id for r in results} == {items[0].id, items[2].id}
+    
     def test_store_fact(self, service, user_id):
         """Test storing a fact."""
         item = service.store_fact(user_id, "User's name is Alice")
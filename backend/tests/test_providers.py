@@ -141,19 +141,33 @@ class TestCrossPostResult:
 # Telegram Provider
 # =============================================================================
 
+@pytest.fixture(scope="module")
+def telegram_provider():
+    """Shared provider (tests do not mutate its state)."""
+    return TelegramProvider(bot_token="123:ABC")
+
+
+@pytest.fixture(scope="module")
+def vk_provider():
+    """Shared provider (tests do not mutate its state)."""
+    return VKProvider(app_id="123", app_secret="secret")
+
+
 class TestTelegramProvider:
     """Tests for TelegramProvider."""
 
-    def test_init(self):
-        provider = TelegramProvider(bot_token="123:ABC")
+    @pytest.fixture
+    def provider(self, telegram_provider):
+        """Use the module-shared TelegramProvider."""
+        return telegram_provider
+
+    def test_init(self, provider):
         assert provider.name == "telegram"
         assert provider.max_text_length == 4096
         assert provider.max_media_per_post == 10
         assert provider.supports_media is True
 
-    def test_normalize_channel_id(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_normalize_channel_id(self, provider):
         # Already has @
         assert provider._normalize_channel_id("@mychannel") == "@mychannel"
 
@@ -163,9 +177,7 @@ class TestTelegramProvider:
         # Numeric ID (negative)
         assert provider._normalize_channel_id("-1001234567890") == "-1001234567890"
 
-    def test_truncate_text(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_truncate_text(self, provider):
         # Short text - no change
         assert provider.truncate_text("Hello") == "Hello"
 
@@ -175,9 +187,7 @@ class TestTelegramProvider:
         assert len(truncated) == 4096
         assert truncated.endswith("...")
 
-    def test_format_text(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_format_text(self, provider):
         # Bold
         assert provider.format_text("**bold**") == "<b>bold</b>"
 
@@ -190,9 +200,7 @@ class TestTelegramProvider:
         # Link
         assert provider.format_text("[text](https://example.com)") == '<a href="https://example.com">text</a>'
 
-    def test_split_media(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_split_media(self, provider):
         # Less than limit
         media = [MediaItem(type=MediaType.IMAGE, url=f"https://example.com/{i}.jpg") for i in range(5)]
         chunks = provider.split_media(media)
@@ -206,9 +214,7 @@ class TestTelegramProvider:
         assert len(chunks[0]) == 10
         assert len(chunks[1]) == 5
 
-    def test_build_message_url(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_build_message_url(self, provider):
         # With username
         url = provider._build_message_url("@mychannel", 123)
         assert url == "https://t.me/mychannel/123"
@@ -217,9 +223,7 @@ class TestTelegramProvider:
         url = provider._build_message_url("-1001234567890", 123)
         assert url is None
 
-    def test_extract_retry_after(self):
-        provider = TelegramProvider(bot_token="123:ABC")
-
+    def test_extract_retry_after(self, provider):
         # With retry_after
         result = provider._extract_retry_after("Flood control exceeded. Retry after 30 seconds.")
         assert result == 30
@@ -236,16 +240,18 @@ class TestTelegramProvider:
 class TestVKProvider:
     """Tests for VKProvider."""
 
-    def test_init(self):
-        provider = VKProvider(app_id="123", app_secret="secret")
+    @pytest.fixture
+    def provider(self, vk_provider):
+        """Use the module-shared VKProvider."""
+        return vk_provider
+
+    def test_init(self, provider):
         assert provider.name == "vk"
         assert provider.max_text_length == 15895
         assert provider.max_media_per_post == 10
         assert provider.supports_formatting is False
 
-    def test_normalize_group_id(self):
-        provider = VKProvider(app_id="123", app_secret="secret")
-
+    def test_normalize_group_id(self, provider):
         # Just number
         assert provider._normalize_group_id("123456") == -123456
 
@@ -259,6 +265,7 @@ class TestVKProvider:
         assert provider._normalize_group_id("public123456") == -123456
 
     def test_get_auth_url(self):
+        # get_auth_url stores the PKCE verifier, so use a private instance
         provider = VKProvider(app_id="123", app_secret="secret")
         url, state = provider.get_auth_url("https://example.com/callback")
 
@@ -269,8 +276,7 @@ class TestVKProvider:
         assert state is not None
         assert len(state) > 20
 
-    def test_pkce_challenge(self):
-        provider = VKProvider(app_id="123", app_secret="secret")
+    def test_pkce_challenge(self, provider):
         verifier = "test_verifier_12345"
         challenge = provider._generate_pkce_challenge(verifier)
 
@@ -279,6 +285,12 @@ class TestVKProvider:
         assert len(challenge) > 20
         assert "+" not in challenge  # base64url doesn't use +
         assert "/" not in challenge  # base64url doesn't use /
+        assert not challenge.endswith("=")  # padding stripped
+
+        # RFC 7636, Appendix B
+        assert provider._generate_pkce_challenge(
+            "dBjftJeZ4CVP-mB92K27uhbUJU1p1r_wW1gFWFOEjXk"
+        ) == "E9Melhoa2OwvFrEMTJguCHaoeK1t8URWbuGJSstw-cM"
 
 
 # =============================================================================
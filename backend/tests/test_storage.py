@@ -4,6 +4,10 @@ Tests for Layer 0: Storage
 Run with: pytest -q
 """
 import pytest
+import dataclasses
+import hashlib
+import io
+import sqlite3
 import tempfile
 import json
 from pathlib import Path
@@ -37,6 +41,27 @@ class TestDatabase:
         assert "memory_items" in table_names
         assert "costs" in table_names
     
+    def test_connection_pragmas(self, db):
+        """Test connection is tuned for WAL with relaxed fsync."""
+        assert db.fetch_value("PRAGMA journal_mode") == "wal"
+        assert db.fetch_value("PRAGMA synchronous") == 1  # NORMAL
+        assert db.fetch_value("PRAGMA foreign_keys") == 1
+        assert db.fetch_value("PRAGMA temp_store") == 2  # MEMORY
+        assert db.fetch_value("PRAGMA cache_size") == -Database.CACHE_SIZE_KB
+    
+    def test_in_memory_database(self):
+        """Test :memory: databases outlive close() and are isolated per instance."""
+        db = Database(":memory:")
+        other = Database(":memory:")
+        db.execute("INSERT INTO users (tg_id, username) VALUES (?, ?)", (1, "a"))
+        
+        # Closing this thread's connection keeps the data alive
+        db.close()
+        
+        assert db.fetch_value("SELECT COUNT(*) FROM users") == 1
+        assert other.fetch_value("SELECT COUNT(*) FROM users") == 0
+        assert not (Path.cwd() / ":memory:").exists()
+    
     def test_insert_and_fetch_user(self, db):
         """Test inserting and fetching a user."""
         user_id = db.execute(
@@ -54,13 +79,9 @@ class TestDatabase:
     
     def test_fetch_value(self, db):
         """Test fetching single value."""
-        db.execute(
-            "INSERT INTO users (tg_id, username) VALUES (?, ?)",
-            (111, "user1")
-        )
-        db.execute(
+        db.execute_many(
             "INSERT INTO users (tg_id, username) VALUES (?, ?)",
-            (222, "user2")
+            [(111, "user1"), (222, "user2")]
         )
         
         count = db.fetch_value("SELECT COUNT(*) FROM users")
@@ -79,9 +100,10 @@ class TestDatabase:
     
     def test_fetch_all(self, db):
         """Test fetching multiple rows."""
-        db.execute("INSERT INTO users (tg_id, username) VALUES (?, ?)", (111, "a"))
-        db.execute("INSERT INTO users (tg_id, username) VALUES (?, ?)", (222, "b"))
-        db.execute("INSERT INTO users (tg_id, username) VALUES (?, ?)", (333, "c"))
+        db.execute_many(
+            "INSERT INTO users (tg_id, username) VALUES (?, ?)",
+            [(111, "a"), (222, "b"), (333, "c")]
+        )
         
         users = db.fetch_all("SELECT * FROM users ORDER BY tg_id")
         
@@ -89,6 +111,17 @@ class TestDatabase:
         assert users[0]["tg_id"] == 111
         assert users[2]["tg_id"] == 333
     
+    def test_iter_rows(self, db):
+        """Test iterating rows across several fetch batches."""
+        db.execute_many(
+            "INSERT INTO users (tg_id, username) VALUES (?, ?)",
+            [(i, f"user{i}") for i in range(1, 6)]
+        )
+        
+        rows = list(db.iter_rows("SELECT * FROM users ORDER BY tg_id", batch_size=2))
+        
+        assert [row["tg_id"] for row in rows] == [1, 2, 3, 4, 5]
+    
     def test_transaction_commit(self, db):
         """Test transaction commits on success."""
         with db.transaction():
@@ -154,15 +187,26 @@ class TestDatabase:
         
         count = db.fetch_value("SELECT COUNT(*) FROM users")
         assert count == 3
+    
+    def test_execute_many_is_atomic(self, db):
+        """Test a failing row rolls back the whole batch."""
+        with pytest.raises(sqlite3.IntegrityError):
+            db.execute_many(
+                "INSERT INTO users (tg_id, username) VALUES (?, ?)",
+                [(100, "user100"), (100, "duplicate")]
+            )
+        
+        count = db.fetch_value("SELECT COUNT(*) FROM users")
+        assert count == 0
 
 
 class TestFileStorage:
     """Tests for FileStorage class."""
     
-    @pytest.fixture
-    def storage(self, tmp_path):
-        """Create fresh file storage for each test."""
-        return FileStorage(tmp_path)
+    @pytest.fixture(params=FileStorage.BACKENDS)
+    def storage(self, request, tmp_path):
+        """Create fresh file storage for each test, on every backend."""
+        return FileStorage(tmp_path, backend=request.param)
     
     def test_save_and_load_bytes(self, storage):
         """Test saving and loading raw bytes."""
@@ -179,6 +223,34 @@ class TestFileStorage:
         loaded = storage.load(ref)
         assert loaded == data
     
+    def test_save_stream(self, storage):
+        """Test saving from a file-like object in chunks."""
+        data = bytes(range(256)) * 10
+        storage.CHUNK_SIZE = 1000  # force several chunks
+        
+        ref = storage.save(io.BytesIO(data), "uploads", "stream.bin")
+        
+        assert ref.size_bytes == len(data)
+        assert ref.checksum == hashlib.sha256(data).hexdigest()
+        assert storage.load(ref) == data
+    
+    def test_load_view(self, storage):
+        """Test loading small and memory-mapped files as views."""
+        small = storage.save(b"small", "uploads", "small.bin")
+        view = storage.load_view(small)
+        assert view.readonly
+        assert view.tobytes() == b"small"
+        
+        # Memory-mapped on disk, a plain view in memory
+        data = bytes(range(256)) * 4
+        storage.MMAP_THRESHOLD = len(data)
+        large = storage.save(data, "uploads", "large.bin")
+        with storage.load_view(large) as view:
+            assert view.readonly
+            assert view.nbytes == len(data)
+            assert view[:4].tobytes() == b"\x00\x01\x02\x03"
+            assert view.tobytes() == data
+    
     def test_save_and_load_text(self, storage):
         """Test saving and loading text."""
         text = "Привет, мир!"  # Test unicode
@@ -201,6 +273,32 @@ class TestFileStorage:
         loaded = storage.load_json(ref)
         assert loaded == obj
     
+    def test_save_json_unicode(self, storage):
+        """Test JSON is stored as readable UTF-8."""
+        obj = {"text": "Привет 🌍", 1: "int key"}
+        
+        ref = storage.save_json(obj, "snapshots", "unicode.json")
+        
+        raw = storage.load(ref)
+        assert "Привет".encode("utf-8") in raw
+        assert storage.load_json(ref) == {"text": "Привет 🌍", "1": "int key"}
+    
+    def test_json_files_independent_of_orjson(self, storage, monkeypatch):
+        """Test save_json/load_json give identical results with and without orjson."""
+        import app.storage.files as files
+        
+        obj = {"a": 1, "nan": float("nan"), 2: "two"}
+        outputs = []
+        for has_orjson in (True, False):
+            monkeypatch.setattr(files, "HAS_ORJSON", has_orjson)
+            ref = storage.save_json(obj, "snapshots", f"same_{has_orjson}.json")
+            outputs.append((storage.load(ref), repr(storage.load_json(ref))))
+            with pytest.raises(TypeError):
+                storage.save_json({"at": datetime(2024, 1, 1)}, "snapshots", "bad.json")
+        
+        assert outputs[0] == outputs[1]
+        assert b'"nan": NaN' in outputs[0][0]
+    
     def test_file_exists(self, storage):
         """Test checking file existence."""
         ref = storage.save(b"test", "uploads", "exists.txt")
@@ -228,6 +326,7 @@ class TestFileStorage:
         deleted_again = storage.delete(ref)
         assert deleted_again is False
     
+    @pytest.mark.parametrize("storage", ["disk"], indirect=True)
     def test_get_path(self, storage):
         """Test getting file path."""
         ref = storage.save(b"test", "uploads", "pathtest.txt")
@@ -247,6 +346,13 @@ class TestFileStorage:
         
         assert loaded == b"test data"
     
+    def test_ref_is_immutable(self, storage):
+        """Test FileRef cannot be changed after save."""
+        ref = storage.save(b"test", "uploads", "frozen.txt")
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            ref.checksum = "tampered"
+    
     def test_invalid_storage_type(self, storage):
         """Test error on invalid storage type."""
         with pytest.raises(ValueError, match="Invalid storage_type"):
@@ -262,6 +368,9 @@ class TestFileStorage:
         
         with pytest.raises(FileNotFoundError):
             storage.load(fake_ref)
+        
+        with pytest.raises(FileNotFoundError):
+            storage.load_view(fake_ref)
     
     def test_list_files(self, storage):
         """Test listing files."""
@@ -299,6 +408,21 @@ class TestFileStorage:
         )
         
         assert ref.metadata == metadata
+    
+    def test_memory_backend_writes_nothing(self, tmp_path):
+        """Test memory backend keeps files off disk."""
+        storage = FileStorage(tmp_path / "mem", backend="memory")
+        
+        ref = storage.save(b"data", "uploads", "a.txt")
+        
+        assert storage.backend == "memory"
+        assert storage.load(ref) == b"data"
+        assert not (tmp_path / "mem").exists()
+    
+    def test_invalid_backend(self, tmp_path):
+        """Test error on unknown backend."""
+        with pytest.raises(ValueError, match="Invalid backend"):
+            FileStorage(tmp_path, backend="s3")
 
 
 class TestJsonHelpers:
@@ -330,6 +454,35 @@ class TestJsonHelpers:
         assert "Привет" in result
         assert "🌍" in result
     
+    def test_to_json_roundtrip(self):
+        """Test non-string keys, dates and wide integers."""
+        obj = {1: "one", "big": 2 ** 70, "day": datetime(2024, 1, 15).date()}
+        
+        parsed = from_json(to_json(obj))
+        
+        assert parsed == {"1": "one", "big": 2 ** 70, "day": "2024-01-15"}
+    
+    def test_to_json_unsupported_type(self):
+        """Test unsupported objects still raise TypeError."""
+        with pytest.raises(TypeError):
+            to_json({"obj": object()})
+    
+    def test_json_output_independent_of_orjson(self, monkeypatch):
+        """Test to_json/from_json give identical results with and without orjson."""
+        import app.storage.database as database
+        
+        obj = {"a": 1, "analysis_version": "v2", "nan": float("nan"), 2: "two"}
+        outputs = []
+        for has_orjson in (True, False):
+            monkeypatch.setattr(database, "HAS_ORJSON", has_orjson)
+            text = to_json(obj)
+            outputs.append((text, repr(from_json(text))))
+            with pytest.raises(TypeError):
+                to_json({"ref": FileRef(ref_id="a", storage_type="uploads", filename="f")})
+        
+        assert outputs[0] == outputs[1]
+        assert outputs[0][0] == '{"a": 1, "analysis_version": "v2", "nan": NaN, "2": "two"}'
+    
     def test_from_json_basic(self):
         """Test basic JSON parsing."""
         s = '{"key": "value"}'
@@ -405,6 +558,49 @@ class TestSchemaIntegrity:
         
         assert "tasks_with_user" in view_names
     
+    def test_template_matches_schema_sql(self, tmp_path):
+        """Verify a fresh database matches running SCHEMA_SQL directly."""
+        from app.storage import SCHEMA_SQL
+        
+        db = Database(tmp_path / "fresh.sqlite3")
+        
+        reference = sqlite3.connect(":memory:")
+        reference.executescript(SCHEMA_SQL)
+        query = "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+        
+        assert [tuple(row) for row in db.fetch_all(query)] == reference.execute(query).fetchall()
+        assert db.fetch_value("PRAGMA journal_mode") == "wal"
+    
+    def test_template_never_replaces_existing_file(self, tmp_path):
+        """Verify an existing (even empty) file is initialized in place, not replaced."""
+        from app.storage.schema import create_from_template
+        
+        path = tmp_path / "shared.sqlite3"
+        path.touch()  # another process created it first
+        assert create_from_template(path) is False
+        
+        db = Database(path)
+        db.execute("INSERT INTO users (tg_id, username) VALUES (?, ?)", (1, "a"))
+        
+        assert create_from_template(path) is False
+        assert Database(path).fetch_value("SELECT COUNT(*) FROM users") == 1
+        assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == ".tmp") == []
+    
+    def test_template_file_mode_matches_sqlite(self, tmp_path):
+        """Verify template-created files get the same mode as SQLite-created ones."""
+        import os
+        import stat
+        
+        db = Database(tmp_path / "template.sqlite3")  # keep open so -wal exists
+        sqlite3.connect(str(tmp_path / "plain.sqlite3")).close()
+        
+        def mode(name):
+            return stat.S_IMODE(os.stat(tmp_path / name).st_mode)
+        
+        assert mode("template.sqlite3") == mode("plain.sqlite3")
+        assert mode("template.sqlite3-wal") == mode("plain.sqlite3")
+        db.close()
+    
     def test_status_constraint(self, db):
         """Test task status constraint."""
         user_id = db.execute(
@@ -434,11 +630,13 @@ class TestSchemaIntegrity:
         )
         
         # Valid types
-        for mem_type in ["fact", "decision", "context", "task", "feedback"]:
-            db.execute(
-                "INSERT INTO memory_items (user_id, memory_type, content) VALUES (?, ?, ?)",
+        db.execute_many(
+            "INSERT INTO memory_items (user_id, memory_type, content) VALUES (?, ?, ?)",
+            [
                 (user_id, mem_type, "test content")
-            )
+                for mem_type in ["fact", "decision", "context", "task", "feedback"]
+            ]
+        )
         
         # Invalid type should fail
         with pytest.raises(Exception):
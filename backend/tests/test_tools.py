@@ -16,6 +16,22 @@ from app.tools import (
 )
 
 
+@pytest.fixture(scope="module")
+def shared_db():
+    """Build one in-memory database per module; tests reset it instead of re-creating."""
+    db = Database(Database.MEMORY_PATH)
+    yield db
+    db.close()
+
+
+def reset_database(db: Database) -> Database:
+    """Empty the tables tool tests write to, children first."""
+    with db.transaction():
+        for table in ("task_events", "tasks", "users", "sqlite_sequence"):
+            db.execute(f"DELETE FROM {table}")
+    return db
+
+
 class TestToolRegistry:
     """Tests for ToolRegistry."""
     
@@ -51,6 +67,15 @@ class TestToolRegistry:
         assert tool is not None
         assert tool.name == "my_tool"
     
+    def test_register_interns_name(self, registry):
+        """Test registered names are interned."""
+        import sys
+        
+        name = "".join(["interned", "_tool"])  # built at runtime, not a literal
+        spec = registry.register(name, lambda **kwargs: {})
+        
+        assert spec.name is sys.intern("interned_tool")
+    
     def test_get_nonexistent_tool(self, registry):
         """Test getting non-existent tool returns None."""
         tool = registry.get("nonexistent")
@@ -81,6 +106,24 @@ class TestToolRegistry:
         names = registry.list_names()
         assert set(names) == {"tool1", "tool2", "tool3"}
     
+    def test_list_names_cache_invalidation(self, registry):
+        """Test cached names follow register/unregister/clear."""
+        def handler(**kwargs):
+            return {}
+        
+        registry.register("tool1", handler)
+        assert registry.list_names() == ("tool1",)
+        assert registry.list_names() is registry.list_names()
+        
+        registry.register("tool2", handler)
+        assert registry.list_names() == ("tool1", "tool2")
+        
+        registry.unregister("tool1")
+        assert registry.list_names() == ("tool2",)
+        
+        registry.clear()
+        assert registry.list_names() == ()
+    
     def test_unregister_tool(self, registry):
         """Test unregistering a tool."""
         def handler(**kwargs):
@@ -119,6 +162,23 @@ class TestToolRegistry:
         research_tools = registry.list_for_task_type("research")
         assert len(research_tools) == 2  # general_tool + research_tool
     
+    def test_list_for_task_type_cache_invalidation(self, registry):
+        """Test cached task-type lists follow register/unregister."""
+        def handler(**kwargs):
+            return {}
+        
+        registry.register("general_tool", handler)
+        assert len(registry.list_for_task_type("smm")) == 1
+        
+        registry.register("smm_tool", handler, allowed_task_types=["smm"])
+        assert len(registry.list_for_task_type("smm")) == 2
+        
+        registry.unregister("general_tool")
+        assert [t.name for t in registry.list_for_task_type("smm")] == ["smm_tool"]
+        
+        registry.clear()
+        assert registry.list_for_task_type("smm") == ()
+    
     def test_clear_registry(self, registry):
         """Test clearing registry."""
         def handler(**kwargs):
@@ -168,6 +228,61 @@ class TestRateLimiter:
         assert limiter.get_calls_in_window(1, 60, tool_name="tool_b") == 1
         assert limiter.get_calls_in_window(1, 60) == 3  # All calls
     
+    def test_window_expiry(self, limiter, monkeypatch):
+        """Test calls age out of the window and old buckets are evicted."""
+        second = 1_000_000_000
+        now = [1000 * second]
+        monkeypatch.setattr("app.tools.policy.time.monotonic_ns", lambda: now[0])
+        
+        limiter.record_call(user_id=1, tool_name="tool_a")
+        now[0] += 30 * second
+        limiter.record_call(user_id=1, tool_name="tool_a")
+        
+        assert limiter.get_calls_in_window(1, 60) == 2
+        assert limiter.get_calls_in_window(1, 3600) == 2
+        
+        now[0] += 45 * second
+        assert limiter.get_calls_in_window(1, 60) == 1
+        assert limiter.get_calls_in_window(1, 60, tool_name="tool_a") == 1
+        assert limiter.get_calls_in_window(1, 3600) == 2
+        
+        now[0] += 3600 * second
+        assert limiter.get_calls_in_window(1, 3600) == 0
+        
+        limiter.record_call(user_id=1)
+        assert limiter.get_calls_in_window(1, 60) == 1
+        assert len(limiter._windows[(1, None)].starts) == 1  # expired buckets trimmed
+    
+    def test_sweep_idle_users(self, limiter, monkeypatch):
+        """Test keys idle past retention are swept on later records."""
+        second = 1_000_000_000
+        now = [1000 * second]
+        monkeypatch.setattr("app.tools.policy.time.monotonic_ns", lambda: now[0])
+        limiter.SWEEP_EVERY = 2
+        
+        limiter.record_call(user_id=1, tool_name="tool_a")
+        now[0] += 3601 * second
+        limiter.record_call(user_id=2)
+        
+        assert set(limiter._windows) == {(2, None)}
+    
+    def test_concurrent_record_calls(self, limiter):
+        """Test no calls are lost when recording from many threads."""
+        import threading
+        
+        def worker():
+            for _ in range(500):
+                limiter.record_call(user_id=1, tool_name="tool_a")
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert limiter.get_calls_in_window(1, 60) == 4000
+        assert limiter.get_calls_in_window(1, 60, tool_name="tool_a") == 4000
+    
     def test_clear_user(self, limiter):
         """Test clearing specific user."""
         limiter.record_call(user_id=1)
@@ -316,6 +431,47 @@ class TestPolicyEngine:
         
         assert result.allowed is True
     
+    def test_domain_allowlist_matches_host(self, policy):
+        """Test allowlist matches the URL host, not a substring."""
+        tool = ToolSpec(
+            name="web_fetch",
+            description="Fetch",
+            handler=lambda **kwargs: {},
+        )
+        
+        def allowed(url):
+            return policy.check_tool_call(
+                tool=tool,
+                user_id=1,
+                task_type="general",
+                parameters={"url": url},
+            ).allowed
+        
+        assert allowed("https://sub.example.com/page") is True
+        assert allowed("https://user@Example.COM:8443?q=1") is True
+        assert allowed("https://blocked.com/?next=example.com") is False
+        assert allowed("https://notexample.com/") is False
+    
+    def test_wildcard_domain(self):
+        """Test *.domain entries allow subdomains but not the domain itself."""
+        policy = PolicyEngine(PolicyConfig(allowed_domains={"*.Example.com"}))
+        tool = ToolSpec(
+            name="web_fetch",
+            description="Fetch",
+            handler=lambda **kwargs: {},
+        )
+        
+        def allowed(url):
+            return policy.check_tool_call(
+                tool=tool,
+                user_id=1,
+                task_type="general",
+                parameters={"url": url},
+            ).allowed
+        
+        assert allowed("https://a.b.example.com/") is True
+        assert allowed("https://example.com/") is False
+    
     def test_deny_command_not_whitelisted(self, policy):
         """Test denying non-whitelisted shell command."""
         tool = ToolSpec(
@@ -351,6 +507,20 @@ class TestPolicyEngine:
         
         assert result.allowed is True
     
+    def test_pipeline_selects_applicable_checks(self, policy):
+        """Test per-tool pipelines only include checks that can apply."""
+        assert policy._build_pipeline("basic") == (
+            policy._check_task_type, policy._check_global_rate,
+        )
+        assert policy._check_tool_rate in policy._build_pipeline("limited_tool")
+        assert policy._check_domain in policy._build_pipeline("web_fetch")
+        assert policy._check_command in policy._build_pipeline("shell")
+        
+        # Empty allowlists add no checks
+        default = PolicyEngine()
+        assert default._build_pipeline("web_fetch") == default._build_pipeline("basic")
+        assert default._build_pipeline("shell") == default._build_pipeline("basic")
+    
     def test_check_approval_required(self, policy):
         """Test checking approval requirement."""
         low_impact = ToolSpec(
@@ -387,15 +557,28 @@ class TestPolicyEngine:
         
         assert status["calls_per_minute"] == 2
         assert status["limits"]["per_minute"] == 5
+    
+    def test_get_rate_limit_status_bulk(self, policy):
+        """Test bulk status matches per-user status."""
+        policy.record_call(user_id=1, tool_name="test")
+        policy.record_call(user_id=1, tool_name="test")
+        policy.record_call(user_id=2, tool_name="test")
+        
+        statuses = policy.get_rate_limit_status_bulk([1, 2, 3])
+        
+        assert statuses[1]["calls_per_minute"] == 2
+        assert statuses[2]["calls_per_hour"] == 1
+        assert statuses[3]["calls_per_minute"] == 0
+        assert statuses[1] == policy.get_rate_limit_status(user_id=1)
 
 
 class TestToolRuntime:
     """Tests for ToolRuntime."""
     
     @pytest.fixture
-    def db(self, tmp_path):
-        """Create database."""
-        return Database(tmp_path / "test.sqlite3")
+    def db(self, shared_db):
+        """Get an empty database."""
+        return reset_database(shared_db)
     
     @pytest.fixture
     def runtime(self, db):
@@ -488,6 +671,78 @@ class TestToolRuntime:
         assert result.success is False
         assert "timed out" in result.error
     
+    def test_hung_tool_cannot_starve_others(self, db, user_id):
+        """Test a hung handler is not retried and cannot take the whole pool."""
+        import threading
+        from app.tools import runtime as runtime_module
+        
+        release = threading.Event()
+        started = []
+        
+        def hung_handler(**kwargs):
+            started.append(1)
+            release.wait(30)
+            return {}
+        
+        runtime = ToolRuntime(db=db)
+        runtime.registry.register("hung_tool", hung_handler, timeout_seconds=1)
+        runtime.registry.register("fast_tool", lambda **kwargs: {"ok": True})
+        
+        def call_hung():
+            return runtime.execute(tool_name="hung_tool", parameters={}, user_id=user_id)
+        
+        results = []
+        callers = [
+            threading.Thread(target=lambda: results.append(call_hung()))
+            for _ in range(runtime_module._TOOL_MAX_ABANDONED + 2)
+        ]
+        try:
+            for t in callers:
+                t.start()
+            for t in callers:
+                t.join()
+            
+            # Every call ran once and timed out; none was retried
+            assert len(started) == len(callers)
+            assert all("timed out" in r.error for r in results)
+            
+            # The tool is now refused without using a worker...
+            refused = call_hung()
+            assert "still running" in refused.error
+            assert len(started) == len(callers)
+            
+            # ...while other tools keep working
+            fast = runtime.execute(tool_name="fast_tool", parameters={}, user_id=user_id)
+            assert fast.success is True
+        finally:
+            release.set()
+    
+    def test_slow_tool_concurrency_not_capped(self, db, user_id):
+        """Test healthy calls to one tool may run concurrently past the hung-call cap."""
+        import threading
+        from app.tools import runtime as runtime_module
+        
+        barrier = threading.Barrier(runtime_module._TOOL_MAX_ABANDONED + 2)
+        
+        runtime = ToolRuntime(db=db)
+        runtime.registry.register(
+            "slow_tool", lambda **kwargs: {"waited": barrier.wait(5) >= 0},
+        )
+        
+        results = []
+        callers = [
+            threading.Thread(target=lambda: results.append(
+                runtime.execute(tool_name="slow_tool", parameters={}, user_id=user_id)
+            ))
+            for _ in range(barrier.parties)
+        ]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+        
+        assert all(r.success for r in results)
+    
     def test_check_approval_required(self, runtime):
         """Test checking approval requirement."""
         assert runtime.check_approval_required("telegram_publish") is True
@@ -527,6 +782,32 @@ class TestToolModels:
         assert data["data"] == {"key": "value"}
         assert data["execution_time_ms"] == 100
     
+    def test_tool_result_to_json(self):
+        """Test ToolResult.to_json round-trips non-ASCII and datetimes."""
+        import json
+        
+        when = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        result = ToolResult(
+            success=True,
+            data={"text": "Привет", "at": when},
+            tool_name="test",
+        )
+        
+        data = json.loads(result.to_json())
+        
+        assert data["data"]["text"] == "Привет"
+        assert data["data"]["at"].startswith("2024-01-02T03:04:05")
+        assert data["tool_name"] == "test"
+    
+    def test_models_use_slots(self):
+        """Test tool models have no per-instance __dict__."""
+        spec = ToolSpec(name="test", description="", handler=lambda **kwargs: {})
+        result = ToolResult(success=True)
+        call = ToolCall(tool_name="test", parameters={})
+        
+        for obj in (spec, result, call):
+            assert not hasattr(obj, "__dict__")
+    
     def test_tool_call_execution_time(self):
         """Test ToolCall.execution_time_ms calculation."""
         now = datetime.now(timezone.utc)
@@ -540,15 +821,26 @@ class TestToolModels:
         
         # Same time = 0ms
         assert call.execution_time_ms == 0
+    
+    def test_tool_call_execution_time_ns(self):
+        """Test monotonic ns timestamps take precedence for duration."""
+        call = ToolCall(
+            tool_name="test",
+            parameters={},
+            called_at_ns=5_000_000_000,
+            completed_at_ns=5_012_900_000,
+        )
+        
+        assert call.execution_time_ms == 12
 
 
 class TestBuiltinTools:
     """Tests for built-in tools."""
     
     @pytest.fixture
-    def runtime(self, tmp_path):
+    def runtime(self, shared_db):
         """Create runtime with built-in tools."""
-        db = Database(tmp_path / "test.sqlite3")
+        db = reset_database(shared_db)
         rt = ToolRuntime(db=db)
         register_builtin_tools(rt)
         